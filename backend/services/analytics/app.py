@@ -2,9 +2,13 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import List
+from common.instrumentation import instrument_app
 
 app = FastAPI()
 
+# Request metrics on /metrics and X-Request-ID propagation
+instrument_app(app)
+
 # This is a mock database. In a real application, you'd use a proper database and perform actual analytics.
 attendance_db = {}
 
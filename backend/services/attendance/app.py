@@ -3,9 +3,13 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import List
 import uuid
+from common.instrumentation import instrument_app
 
 app = FastAPI()
 
+# Request metrics on /metrics and X-Request-ID propagation
+instrument_app(app)
+
 # This is a mock database. In a real application, you'd use a proper database.
 attendance_db = {}
 
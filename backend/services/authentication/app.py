@@ -5,9 +5,13 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 import os
+from common.instrumentation import instrument_app
 
 app = FastAPI()
 
+# Request metrics on /metrics and X-Request-ID propagation
+instrument_app(app)
+
 # to get a string like this run:
 # openssl rand -hex 32
 SECRET_KEY = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
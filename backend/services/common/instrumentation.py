@@ -0,0 +1,142 @@
+"""Logging, metrics and request ids shared by the backend services.
+
+Each service calls setup_logging() and instrument_app() at startup, times the
+interesting parts of a request with stage(), and passes request_id_headers()
+on calls to other services so one request can be followed across their logs.
+"""
+import atexit
+import contextlib
+import contextvars
+import logging
+import queue
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+from starlette.routing import Match
+
+REQUEST_ID_HEADER = "X-Request-ID"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests", ["method", "route"]
+)
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds", "Time spent in each stage of request handling", ["stage"], buckets=STAGE_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result", ["cache", "result"]
+)
+
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def setup_logging(service_name):
+    # Records go through an in-memory queue; a background thread does the
+    # formatting and file writes so request handlers never wait on disk
+    file_handler = RotatingFileHandler(f"{service_name}_service.log", maxBytes=LOG_MAX_BYTES, backupCount=3)
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+    ))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The request id has to be read in the handling task, not the listener
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger(f"{service_name}_service")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    return logger
+
+
+def request_id_headers():
+    return {REQUEST_ID_HEADER: request_id_var.get()}
+
+
+@contextlib.contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class StatsCollector:
+    # Exposes a stats() dict, e.g. RecognitionCache.stats, as metrics. Fields
+    # named in `counters` only ever grow and are exported as counters; the
+    # rest, like sizes and ratios, as gauges.
+    def __init__(self, prefix, stats, counters=()):
+        self.prefix = prefix
+        self.stats = stats
+        self.counters = set(counters)
+
+    def collect(self):
+        for name, value in self.stats().items():
+            if not isinstance(value, (int, float)):
+                continue
+            metric = CounterMetricFamily if name in self.counters else GaugeMetricFamily
+            yield metric(f"{self.prefix}_{name}", f"{self.prefix} {name.replace('_', ' ')}", value=value)
+
+
+def register_stats(prefix, stats, counters=()):
+    REGISTRY.register(StatsCollector(prefix, stats, counters))
+
+
+def route_template(app, scope):
+    # Label by route template so path parameters don't explode cardinality.
+    # Matched here because the pinned Starlette only records the endpoint,
+    # not the route, on the request scope.
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            # Right path, wrong method
+            partial = route.path
+    return partial or "unmatched"
+
+
+def instrument_app(app):
+    @app.middleware("http")
+    async def instrument_request(request: Request, call_next):
+        token = request_id_var.set(request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex)
+        route = route_template(app, request.scope)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            response.headers[REQUEST_ID_HEADER] = request_id_var.get()
+            return response
+        finally:
+            REQUEST_DURATION.labels(request.method, route).observe(time.perf_counter() - start)
+            REQUESTS.labels(request.method, route, str(status_code)).inc()
+            request_id_var.reset(token)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,34 @@
+import math
+import os
+
+import numpy as np
+from PIL import Image
+
+# Longest side the face detector needs. Larger JPEG uploads are decoded at
+# 1/2, 1/4 or 1/8 scale straight from the DCT coefficients instead of being
+# decoded at full size.
+DETECTION_MAX_SIDE = int(os.getenv("DETECTION_MAX_SIDE", "1280"))
+
+
+def draft_size(size, max_side):
+    width, height = size
+    scale = max_side / max(width, height)
+    if scale >= 1:
+        return None
+    # draft() picks the smallest DCT scale that is still at least this large
+    return math.ceil(width * scale), math.ceil(height * scale)
+
+
+def decode_image(stream, max_side=DETECTION_MAX_SIDE):
+    # Reads the upload straight from its (spooled) file object rather than
+    # copying the whole body into bytes first
+    image = Image.open(stream)
+    if max_side:
+        target = draft_size(image.size, max_side)
+        if target is not None:
+            # No-op for formats other than JPEG
+            image.draft("RGB", target)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    # A writable array, as dlib was always given before
+    return np.array(image)
@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+EMBEDDING_SIZE = 128
+DEFAULT_TOLERANCE = 0.6
+DEFAULT_REFINE_CANDIDATES = 3
+
+
+class RecognitionCache:
+    """Short-lived answers for repeat sightings of the same face.
+
+    Embeddings are hashed into buckets by several independent tables of
+    quantized random projections (p-stable LSH). A repeat sighting only has to
+    land in the same bucket as the cached embedding in one of the tables, and
+    a bucket hit is only trusted when the query is within `radius` of that
+    embedding, so a collision between two different people falls through to
+    a full scan. Entries keep the gallery distance found by the scan so the
+    caller can tell when a cached "Unknown" still holds for the new query.
+    """
+
+    def __init__(self, ttl=5.0, max_entries=10000, tables=4, projections=4, bucket_width=1.0, radius=0.2, seed=0):
+        rng = np.random.default_rng(seed)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tables = tables
+        self.bucket_width = bucket_width
+        self.radius = radius
+        self._projection = rng.standard_normal((EMBEDDING_SIZE, tables * projections))
+        self._offset = rng.uniform(0, bucket_width, tables * projections)
+        # serial -> (expiry, embedding, index, distance, bucket keys), oldest first
+        self._entries = OrderedDict()
+        # bucket key -> serial of the entry that last claimed it
+        self._buckets = {}
+        self._serial = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def buckets(self, embedding):
+        codes = np.floor((embedding @ self._projection + self._offset) / self.bucket_width).astype(np.int64)
+        return [(table, code.tobytes()) for table, code in enumerate(codes.reshape(self.tables, -1))]
+
+    def get(self, keys, embedding):
+        # Returns (index, distance, offset) for the cached embedding closest to
+        # embedding, offset being how far apart the two are, or None
+        now = time.monotonic()
+        best, best_distance = None, self.radius
+        with self._lock:
+            for key in keys:
+                serial = self._buckets.get(key)
+                entry = self._entries.get(serial)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    self._discard(serial)
+                    continue
+                distance = np.linalg.norm(entry[1] - embedding)
+                if distance <= best_distance:
+                    best, best_distance = serial, distance
+            if best is None:
+                return None
+            self._entries.move_to_end(best)
+            _, _, index, distance, _ = self._entries[best]
+            return index, distance, float(best_distance)
+
+    def record(self, hit):
+        # Counted by the caller once it has checked the cached answer
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, keys, embedding, index, distance):
+        with self._lock:
+            self._serial += 1
+            self._entries[self._serial] = (time.monotonic() + self.ttl, embedding, index, distance, keys)
+            for key in keys:
+                previous = self._buckets.get(key)
+                self._buckets[key] = self._serial
+                # Drop an entry once newer ones have claimed all its buckets
+                if previous in self._entries and all(
+                    self._buckets.get(other) != previous for other in self._entries[previous][4]
+                ):
+                    del self._entries[previous]
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, serial):
+        for key in self._entries.pop(serial)[4]:
+            if self._buckets.get(key) == serial:
+                del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+class FaceMatcher:
+    """In-memory gallery of known identities with an optional recognition cache.
+
+    An identity may have many sample encodings. Samples are stored grouped by
+    identity in one array, and each query is first scanned against the
+    per-identity centroids; only the closest `refine_candidates` identities
+    have their individual samples compared, so the scan grows with the number
+    of people rather than the number of photos. frontend/face_gallery.py
+    keeps a copy of load, identity_distance and ranked; change both together.
+    """
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE, cache=None, refine_candidates=DEFAULT_REFINE_CANDIDATES):
+        self.tolerance = tolerance
+        self.cache = cache
+        self.refine_candidates = refine_candidates
+        self.names = []
+        self.samples = np.empty((0, EMBEDDING_SIZE))
+        self.offsets = np.zeros(1, dtype=np.intp)
+        self.centroids = np.empty((0, EMBEDDING_SIZE))
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def sample_count(self):
+        return len(self.samples)
+
+    def load(self, names, encodings):
+        # names[i] is the identity of encodings[i]; names may repeat
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, EMBEDDING_SIZE)
+        identities = list(dict.fromkeys(names))
+        index_of = {name: index for index, name in enumerate(identities)}
+        owners = np.array([index_of[name] for name in names], dtype=np.intp)
+
+        order = np.argsort(owners, kind="stable")
+        counts = np.bincount(owners, minlength=len(identities))
+        samples = encodings[order]
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+        if identities:
+            centroids = np.add.reduceat(samples, offsets[:-1], axis=0) / counts[:, None]
+        else:
+            centroids = np.empty((0, EMBEDDING_SIZE))
+
+        self.names, self.samples, self.offsets, self.centroids = identities, samples, offsets, centroids
+        # Cached indexes point into the old gallery
+        if self.cache is not None:
+            self.cache.clear()
+
+    def identity_distance(self, index, embedding):
+        samples = self.samples[self.offsets[index]:self.offsets[index + 1]]
+        return float(np.min(np.linalg.norm(samples - embedding, axis=1)))
+
+    def ranked(self, embedding, count):
+        # The `count` closest identities as (index, distance), nearest first
+        centroid_distances = np.linalg.norm(self.centroids - embedding, axis=1)
+        refine = min(max(count, self.refine_candidates), len(self.names))
+        candidates = np.argpartition(centroid_distances, refine - 1)[:refine]
+        return sorted(
+            ((int(index), self.identity_distance(index, embedding)) for index in candidates),
+            key=lambda candidate: candidate[1]
+        )[:count]
+
+    def top_k(self, embedding, k):
+        if not self.names:
+            return []
+        return [(self.names[index], distance) for index, distance in self.ranked(embedding, k)]
+
+    def match(self, embedding):
+        # Returns (name, distance); name is None when nobody is within tolerance
+        if not self.names:
+            return None, None
+
+        keys = None
+        if self.cache is not None:
+            keys = self.cache.buckets(embedding)
+            cached = self.cache.get(keys, embedding)
+            if cached is not None:
+                index, cached_distance, offset = cached
+                if index < 0:
+                    # Nobody is nearer this query than cached_distance - offset
+                    # (triangle inequality), so "Unknown" still holds if that
+                    # is beyond the tolerance
+                    if cached_distance - offset > self.tolerance:
+                        self.cache.record(True)
+                        return None, None
+                else:
+                    distance = self.identity_distance(index, embedding)
+                    if distance <= self.tolerance:
+                        self.cache.record(True)
+                        return self.names[index], distance
+            self.cache.record(False)
+
+        best_match_index, distance = self.ranked(embedding, 1)[0]
+        matched = distance <= self.tolerance
+
+        if keys is not None:
+            self.cache.put(keys, embedding, best_match_index if matched else -1, distance)
+
+        if not matched:
+            return None, distance
+        return self.names[best_match_index], distance
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import multiprocessing
+import threading
+
+import httpx
+import numpy as np
+
+from common.instrumentation import request_id_headers
+from matcher import DEFAULT_TOLERANCE, FaceMatcher
+
+logger = logging.getLogger("face_recognition_service")
+
+SHARD_TIMEOUT = 5.0
+
+
+class ShardsUnavailable(Exception):
+    """Raised when no gallery shard answered a query."""
+
+
+def shard_owner(identity, shard_count):
+    # Rendezvous hashing: changing the shard count only moves the identities
+    # whose highest-scoring shard changed, about 1/N of them
+    if shard_count <= 1:
+        return 0
+    return max(
+        range(shard_count),
+        key=lambda shard: hashlib.md5(f"{shard}:{identity}".encode()).digest()
+    )
+
+
+def partition(names, encodings, shard_count):
+    shards = [([], []) for _ in range(shard_count)]
+    for name, encoding in zip(names, encodings):
+        shard_names, shard_encodings = shards[shard_owner(name, shard_count)]
+        shard_names.append(name)
+        shard_encodings.append(encoding)
+    return shards
+
+
+class ShardCoordinator:
+    """Scatters a query embedding to every gallery shard and gathers the top k."""
+
+    def __init__(self, shards, tolerance=DEFAULT_TOLERANCE):
+        self.shards = shards
+        self.tolerance = tolerance
+
+    async def search(self, embedding, k, headers=None):
+        # Returns (top k candidates, number of shards that didn't answer)
+        replies = await asyncio.gather(
+            *(shard.search(embedding, k, headers) for shard in self.shards), return_exceptions=True
+        )
+        candidates = []
+        answered = 0
+        for shard, reply in zip(self.shards, replies):
+            if isinstance(reply, Exception):
+                # Answer from the remaining shards rather than failing the request
+                logger.error("Gallery shard %s failed: %s", shard, reply)
+                continue
+            answered += 1
+            candidates.extend(reply)
+        if not answered:
+            # Nobody can be told apart from a stranger without any gallery
+            raise ShardsUnavailable(f"none of {len(self.shards)} gallery shards answered")
+        best = heapq.nsmallest(k, candidates, key=lambda candidate: candidate[1])
+        return best, len(self.shards) - answered
+
+    async def match(self, embedding, headers=None):
+        # FaceMatcher.match's (name, distance), plus the number of shards that
+        # didn't answer; headers carry the caller's token
+        best, unavailable = await self.search(embedding, 1, headers)
+        if not best:
+            return None, None, unavailable
+        name, distance = best[0]
+        if distance > self.tolerance:
+            return None, distance, unavailable
+        return name, distance, unavailable
+
+
+class HttpShardClient:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self._client = None
+
+    def __repr__(self):
+        return self.url
+
+    @property
+    def client(self):
+        # One pooled connection per shard, created inside the running loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.url, timeout=SHARD_TIMEOUT)
+        return self._client
+
+    async def search(self, embedding, k, headers=None):
+        response = await self.client.post(
+            "/shard/search",
+            json={"embedding": np.asarray(embedding).tolist(), "k": k},
+            headers={**(headers or {}), **request_id_headers()}
+        )
+        response.raise_for_status()
+        return [(result["name"], result["distance"]) for result in response.json()["results"]]
+
+    async def reload(self, headers):
+        response = await self.client.post("/gallery/reload", headers={**headers, **request_id_headers()})
+        response.raise_for_status()
+        return response.json()
+
+
+def _shard_worker(connection, refine_candidates):
+    matcher = FaceMatcher(refine_candidates=refine_candidates)
+    while True:
+        command, *args = connection.recv()
+        if command == "load":
+            matcher.load(*args)
+            connection.send(len(matcher))
+        elif command == "search":
+            connection.send(matcher.top_k(*args))
+        elif command == "stop":
+            break
+
+
+class ProcessShardClient:
+    def __init__(self, index, connection):
+        self.index = index
+        self._connection = connection
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"local shard {self.index}"
+
+    def call(self, *message):
+        with self._lock:
+            self._connection.send(message)
+            return self._connection.recv()
+
+    async def search(self, embedding, k, headers=None):
+        # Local workers don't authenticate
+        return await asyncio.get_running_loop().run_in_executor(None, self.call, "search", embedding, k)
+
+    def stop(self):
+        with self._lock:
+            self._connection.send(("stop",))
+
+
+class LocalShardCluster:
+    """Gallery shards in local worker processes, a stand-in for separate replicas.
+
+    load() partitions a full gallery across the workers the same way
+    GALLERY_SHARD_INDEX/GALLERY_SHARD_COUNT replicas pick their identities, so
+    calling it again after an enrollment rebalances the shards.
+    """
+
+    def __init__(self, shard_count, refine_candidates=3):
+        self.clients = []
+        self._processes = []
+        for index in range(shard_count):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_worker, args=(child, refine_candidates), daemon=True)
+            process.start()
+            self._processes.append(process)
+            self.clients.append(ProcessShardClient(index, parent))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load(self, names, encodings):
+        # Returns the number of identities each shard now owns
+        shards = partition(names, encodings, len(self.clients))
+        return [client.call("load", *shard) for client, shard in zip(self.clients, shards)]
+
+    def coordinator(self, tolerance=DEFAULT_TOLERANCE):
+        return ShardCoordinator(self.clients, tolerance)
+
+    def close(self):
+        for client in self.clients:
+            client.stop()
+        for process in self._processes:
+            process.join(timeout=5)
@@ -2,9 +2,13 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
 import uuid
+from common.instrumentation import instrument_app
 
 app = FastAPI()
 
+# Request metrics on /metrics and X-Request-ID propagation
+instrument_app(app)
+
 # This is a mock database. In a real application, you'd use a proper database.
 notifications_db = {}
 
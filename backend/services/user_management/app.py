@@ -9,18 +9,13 @@ import os
 import redis
 import json
 import httpx
-import logging
-from logging.handlers import RotatingFileHandler
+from common.instrumentation import instrument_app, record_cache_lookup, request_id_headers, setup_logging, stage
 
 app = FastAPI()
 
-# Setup logging
-logger = logging.getLogger("user_management_service")
-logger.setLevel(logging.INFO)
-handler = RotatingFileHandler("user_management_service.log", maxBytes=10000, backupCount=3)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+# Setup logging and metrics
+logger = setup_logging("user_management")
+instrument_app(app)
 
 # Add CORS middleware
 app.add_middleware(
@@ -39,7 +34,7 @@ try:
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     logger.info("Database connection established")
 except Exception as e:
-    logger.error(f"Error connecting to database: {str(e)}")
+    logger.error("Error connecting to database: %s", e)
     raise
 
 Base = declarative_base()
@@ -50,7 +45,7 @@ try:
     redis_client = redis.from_url(redis_url)
     logger.info("Redis connection established")
 except Exception as e:
-    logger.error(f"Error connecting to Redis: {str(e)}")
+    logger.error("Error connecting to Redis: %s", e)
     raise
 
 # OAuth2 scheme for token authentication
@@ -67,7 +62,7 @@ try:
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created")
 except Exception as e:
-    logger.error(f"Error creating database tables: {str(e)}")
+    logger.error("Error creating database tables: %s", e)
     raise
 
 class UserCreate(BaseModel):
@@ -84,85 +79,92 @@ async def verify_token(token: str = Depends(oauth2_scheme)):
         try:
             response = await client.get(
                 f"{os.getenv('AUTHENTICATION_URL', 'http://authentication:8000')}/verify-token",
-                headers={"Authorization": f"Bearer {token}"}
+                headers={"Authorization": f"Bearer {token}", **request_id_headers()}
             )
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
-            logger.error(f"Token verification failed: {str(e)}")
+            logger.error("Token verification failed: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         except Exception as e:
-            logger.error(f"Unexpected error during token verification: {str(e)}")
+            logger.error("Unexpected error during token verification: %s", e)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
 @app.post("/users", response_model=UserResponse)
 async def create_user(user: UserCreate, token: str = Depends(verify_token)):
     try:
-        db = SessionLocal()
-        db_user = User(name=user.name, email=user.email)
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        db.close()
+        with stage("db_write"):
+            db = SessionLocal()
+            db_user = User(name=user.name, email=user.email)
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+            db.close()
 
         # Cache the user data in Redis
         user_data = {"id": db_user.id, "name": db_user.name, "email": db_user.email}
-        redis_client.setex(f"user:{db_user.id}", 3600, json.dumps(user_data))
+        with stage("cache_set"):
+            redis_client.setex(f"user:{db_user.id}", 3600, json.dumps(user_data))
 
         # Send notification
         await send_notification(db_user.id, f"New user created: {db_user.name}")
 
-        logger.info(f"User created: {db_user.id}")
+        logger.info("User created: %s", db_user.id)
         return UserResponse(id=db_user.id, name=db_user.name, email=db_user.email)
     except Exception as e:
-        logger.error(f"Error creating user: {str(e)}")
+        logger.error("Error creating user: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating user")
 
 @app.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, token: str = Depends(verify_token)):
     try:
         # Try to get user data from Redis cache
-        cached_user = redis_client.get(f"user:{user_id}")
+        with stage("cache_get"):
+            cached_user = redis_client.get(f"user:{user_id}")
+        record_cache_lookup("user", cached_user is not None)
         if cached_user:
             user_data = json.loads(cached_user)
-            logger.info(f"User {user_id} retrieved from cache")
+            logger.debug("User %s retrieved from cache", user_id)
             return UserResponse(**user_data)
 
         # If not in cache, get from database
-        db = SessionLocal()
-        user = db.query(User).filter(User.id == user_id).first()
-        db.close()
+        with stage("db_query"):
+            db = SessionLocal()
+            user = db.query(User).filter(User.id == user_id).first()
+            db.close()
 
         if user is None:
-            logger.warning(f"User {user_id} not found")
+            logger.warning("User %s not found", user_id)
             raise HTTPException(status_code=404, detail="User not found")
 
         # Cache the user data in Redis
         user_data = {"id": user.id, "name": user.name, "email": user.email}
-        redis_client.setex(f"user:{user.id}", 3600, json.dumps(user_data))
+        with stage("cache_set"):
+            redis_client.setex(f"user:{user.id}", 3600, json.dumps(user_data))
 
-        logger.info(f"User {user_id} retrieved from database and cached")
+        logger.debug("User %s retrieved from database and cached", user_id)
         return UserResponse(id=user.id, name=user.name, email=user.email)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving user {user_id}: {str(e)}")
+        logger.error("Error retrieving user %s: %s", user_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving user")
 
 @app.get("/users", response_model=list[UserResponse])
 async def get_all_users(token: str = Depends(verify_token)):
     try:
-        db = SessionLocal()
-        users = db.query(User).all()
-        db.close()
-        logger.info(f"Retrieved {len(users)} users")
+        with stage("db_query"):
+            db = SessionLocal()
+            users = db.query(User).all()
+            db.close()
+        logger.info("Retrieved %d users", len(users))
         return [UserResponse(id=user.id, name=user.name, email=user.email) for user in users]
     except Exception as e:
-        logger.error(f"Error retrieving all users: {str(e)}")
+        logger.error("Error retrieving all users: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving users")
 
 async def send_notification(user_id: int, message: str):
@@ -170,12 +172,13 @@ async def send_notification(user_id: int, message: str):
         try:
             response = await client.post(
                 f"{os.getenv('NOTIFICATION_URL', 'http://notification:8000')}/notifications",
-                json={"user_id": str(user_id), "message": message}
+                json={"user_id": str(user_id), "message": message},
+                headers=request_id_headers()
             )
             response.raise_for_status()
-            logger.info(f"Notification sent for user {user_id}")
+            logger.info("Notification sent for user %s", user_id)
         except Exception as e:
-            logger.error(f"Error sending notification for user {user_id}: {str(e)}")
+            logger.error("Error sending notification for user %s: %s", user_id, e)
 
 if __name__ == "__main__":
     import uvicorn
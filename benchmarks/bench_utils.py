@@ -0,0 +1,108 @@
+import contextlib
+import importlib.util
+import io
+import os
+import statistics
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES_DIR = os.path.join(ROOT, "backend", "services")
+SERVICE_DIR = os.path.join(SERVICES_DIR, "face_recognition")
+SAMPLE_FACE = os.path.join(ROOT, "known_faces", "siya.jpg")
+EMBEDDING_SIZE = 128
+
+# Random 128-d vectors with this spread sit about 0.96 apart, close to the
+# distance between encodings of two different people; a repeat sighting is
+# modelled as a small perturbation of the enrolled encoding.
+IDENTITY_SPREAD = 0.06
+SIGHTING_NOISE = 0.01
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def latency_summary(timings_ms):
+    ordered = sorted(timings_ms)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        "samples": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def synthetic_gallery(identities, samples_per_identity=1, seed=0):
+    # Returns (names, encodings, centres); names repeat once per sample
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(0, IDENTITY_SPREAD, (identities, EMBEDDING_SIZE))
+    names = [f"person_{i}" for i in range(identities) for _ in range(samples_per_identity)]
+    encodings = np.repeat(centres, samples_per_identity, axis=0)
+    if samples_per_identity > 1:
+        encodings += rng.normal(0, SIGHTING_NOISE, encodings.shape)
+    return names, encodings, centres
+
+
+def synthetic_sightings(centres, count, unknown_fraction=0.5, seed=1):
+    # Perturbed copies of enrolled encodings mixed with strangers
+    rng = np.random.default_rng(seed)
+    known = rng.random(count) >= unknown_fraction
+    picks = rng.integers(0, len(centres), count)
+    queries = np.where(
+        known[:, None],
+        centres[picks] + rng.normal(0, SIGHTING_NOISE, (count, EMBEDDING_SIZE)),
+        rng.normal(0, IDENTITY_SPREAD, (count, EMBEDDING_SIZE)),
+    )
+    return queries
+
+
+def synthetic_jpeg(width, height, quality=90, seed=0):
+    # Smooth gradients plus noise compress like a camera frame, unlike pure noise
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+@contextlib.contextmanager
+def service_imports():
+    # The service imports its own modules and the shared common package
+    sys.path[:0] = [SERVICE_DIR, SERVICES_DIR]
+    try:
+        yield
+    finally:
+        sys.path.remove(SERVICE_DIR)
+        sys.path.remove(SERVICES_DIR)
+
+
+@contextlib.contextmanager
+def service_workdir(face_images=()):
+    # The service reads known_faces/ and writes its log relative to the cwd
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, service_imports():
+        os.makedirs(os.path.join(workdir, "known_faces"))
+        for path in face_images:
+            with open(path, "rb") as src, open(os.path.join(workdir, "known_faces", os.path.basename(path)), "wb") as dst:
+                dst.write(src.read())
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(previous)
@@ -0,0 +1,106 @@
+"""Microbenchmark for the upload decode paths.
+
+Compares the original decode code of /recognize (face_recognition service) and
+/process_frame (frontend) with the frame_decode stages that replaced them, on
+synthetic JPEG frames. For each path it reports milliseconds per frame and the
+bytes allocated by Python-visible copies (bytes objects and numpy arrays, as
+seen by tracemalloc) while decoding one frame.
+
+    python benchmarks/decode_bench.py --output decode.json
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from bench_utils import latency_summary, load_module, synthetic_jpeg
+
+FRAME_SIZES = ((640, 480), (1920, 1080), (4032, 3024))
+
+
+def legacy_service_decode(stream):
+    contents = stream.read()
+    image = Image.open(io.BytesIO(contents))
+    return np.array(image)
+
+
+def legacy_frontend_decode(stream):
+    import cv2
+    frame_array = np.frombuffer(stream.read(), np.uint8)
+    frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def decode_paths():
+    paths = {
+        "service_legacy": legacy_service_decode,
+        "service_frame_decode": load_module(
+            "service_frame_decode", "backend/services/face_recognition/frame_decode.py"
+        ).decode_image,
+    }
+    try:
+        frontend = load_module("frontend_frame_decode", "frontend/frame_decode.py")
+    except ImportError:
+        # OpenCV is only needed for the frontend paths
+        return paths
+    paths["frontend_legacy"] = legacy_frontend_decode
+    paths["frontend_frame_decode"] = frontend.decode_frame
+    return paths
+
+
+def measure(decode, payload, iterations):
+    # Warm up once so pooled buffers and codec tables are already allocated
+    decode(io.BytesIO(payload))
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    frame = decode(io.BytesIO(payload))
+    allocated = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        stream = io.BytesIO(payload)
+        start = time.perf_counter()
+        decode(stream)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    result = latency_summary(timings)
+    result.update({"decoded_shape": list(frame.shape), "bytes_allocated": allocated})
+    return result
+
+
+def run(iterations=20, sizes=FRAME_SIZES):
+    results = []
+    paths = decode_paths()
+    for width, height in sizes:
+        payload = synthetic_jpeg(width, height)
+        for name, decode in paths.items():
+            result = {"suite": "decode", "case": f"{name}@{width}x{height}", "jpeg_bytes": len(payload)}
+            result.update(measure(decode, payload, iterations))
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for result in results:
+        print(f"{result['case']:<36} {result['p50_ms']:8.2f} ms "
+              f"{result['bytes_allocated'] / 1e6:8.2f} MB allocated -> {result['decoded_shape']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Gallery matching benchmark on synthetic 128-d embeddings.
+
+Builds galleries of random identities (1k to 1M) and times FaceMatcher.match
+for a mix of enrolled people and strangers, with and without the recognition
+cache. The cached run replays a small crowd seen over and over, the case the
+cache is meant for. A 1M gallery needs a few GB of memory.
+
+    python benchmarks/match_bench.py --sizes 1000,10000,100000,1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_utils import latency_summary, load_module, synthetic_gallery, synthetic_sightings
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def time_matches(matcher, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        matcher.match(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(sizes=DEFAULT_SIZES, queries=500, samples_per_identity=1, crowd=20):
+    matcher_module = load_module("matcher", "backend/services/face_recognition/matcher.py")
+    results = []
+    for size in sizes:
+        names, encodings, centres = synthetic_gallery(size, samples_per_identity)
+
+        matcher = matcher_module.FaceMatcher()
+        start = time.perf_counter()
+        matcher.load(names, encodings)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        result = {"suite": "match", "case": f"scan@{size}x{samples_per_identity}", "load_ms": load_ms}
+        result.update(latency_summary(time_matches(matcher, synthetic_sightings(centres, queries))))
+        results.append(result)
+
+        # The same few people walking past the camera frame after frame
+        cached = matcher_module.FaceMatcher(cache=matcher_module.RecognitionCache())
+        cached.load(names, encodings)
+        regulars = centres[np.random.default_rng(2).integers(0, size, crowd)]
+        sightings = synthetic_sightings(regulars, queries, unknown_fraction=0.0)
+        result = {"suite": "match", "case": f"cached@{size}x{samples_per_identity}"}
+        result.update(latency_summary(time_matches(cached, sightings)))
+        result["cache_hit_rate"] = cached.cache.stats()["hit_rate"]
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated gallery sizes")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--samples-per-identity", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.queries, args.samples_per_identity)
+    for result in results:
+        print(f"{result['case']:<24} p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Recognition pipeline and /recognize load test.
+
+Times the decode, detect, encode and match stages on a sample photo, then
+drives the face_recognition service's /recognize endpoint in-process under
+concurrency. Authentication, attendance recording and RabbitMQ publishing are
+stubbed out, so this runs offline; it does need the service's own
+dependencies (face_recognition, fastapi, httpx) installed.
+
+    python benchmarks/pipeline_bench.py --gallery 10000 --concurrency 1,4,16
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+
+from bench_utils import (
+    SAMPLE_FACE,
+    latency_summary,
+    load_module,
+    service_workdir,
+    synthetic_gallery,
+)
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, (time.perf_counter() - start) * 1000
+
+
+def stage_timings(app_module, payload, iterations):
+    import face_recognition
+
+    timings = {"decode": [], "detect": [], "encode": [], "match": []}
+    for _ in range(iterations):
+        image, elapsed = time_call(app_module.decode_image, io.BytesIO(payload))
+        timings["decode"].append(elapsed)
+        locations, elapsed = time_call(face_recognition.face_locations, image)
+        timings["detect"].append(elapsed)
+        encodings, elapsed = time_call(face_recognition.face_encodings, image, locations)
+        timings["encode"].append(elapsed)
+        start = time.perf_counter()
+        for encoding in encodings:
+            app_module.matcher.match(encoding)
+        timings["match"].append((time.perf_counter() - start) * 1000)
+
+    results = []
+    for stage, stage_timings_ms in timings.items():
+        result = {"suite": "pipeline", "case": f"stage:{stage}"}
+        result.update(latency_summary(stage_timings_ms))
+        results.append(result)
+    return results
+
+
+async def load_test(app, payload, concurrency, requests):
+    import httpx
+
+    latencies = []
+    failures = 0
+    remaining = iter(range(requests))
+
+    async def worker(client):
+        nonlocal failures
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post(
+                "/recognize",
+                files={"file": ("frame.jpg", payload, "image/jpeg")},
+                headers={"Authorization": "Bearer benchmark"},
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                failures += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = {"suite": "pipeline", "case": f"recognize@c{concurrency}"}
+    result.update(latency_summary(latencies))
+    result.update({"throughput_rps": requests / elapsed, "failures": failures})
+    return result
+
+
+def stub_dependencies(app_module):
+    async def no_auth():
+        return {"username": "benchmark"}
+
+    async def no_op(*args, **kwargs):
+        return None
+
+    app_module.app.dependency_overrides[app_module.verify_token] = no_auth
+    app_module.send_to_queue = no_op
+    app_module.record_attendance = no_op
+
+
+def run(gallery=10000, iterations=10, concurrency=(1, 4, 16), requests=64, image=SAMPLE_FACE):
+    with open(image, "rb") as f:
+        payload = f.read()
+
+    with service_workdir([image]):
+        app_module = load_module("face_recognition_app", "backend/services/face_recognition/app.py")
+        stub_dependencies(app_module)
+
+        # Pad the real enrolled face out with synthetic identities
+        names, encodings, _ = synthetic_gallery(gallery)
+        matcher = app_module.matcher
+        real_names = [
+            name for index, name in enumerate(matcher.names)
+            for _ in range(matcher.offsets[index + 1] - matcher.offsets[index])
+        ]
+        real_encodings = list(matcher.samples)
+        matcher.load(real_names + names, real_encodings + list(encodings))
+
+        results = stage_timings(app_module, payload, iterations)
+        for level in concurrency:
+            results.append(asyncio.run(load_test(app_module.app, payload, level, requests)))
+
+    for result in results:
+        result["gallery"] = gallery
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gallery", type=int, default=10000, help="synthetic identities added to the gallery")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--image", default=SAMPLE_FACE)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    concurrency = [int(level) for level in args.concurrency.split(",")]
+    results = run(args.gallery, args.iterations, concurrency, args.requests, args.image)
+    for result in results:
+        line = f"{result['case']:<20} p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms"
+        if "throughput_rps" in result:
+            line += f"  {result['throughput_rps']:7.2f} req/s"
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Run the benchmark suites and compare against a previous run.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --suites match --compare results.json
+
+Results are written as JSON with one record per (suite, case). With
+--compare, latency metrics (*_ms) that grew, or throughput that dropped, by
+more than --threshold are reported and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import decode_bench
+import match_bench
+import pipeline_bench
+import shard_bench
+from bench_utils import ROOT
+
+SUITES = ("decode", "match", "pipeline", "shard")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suites(suites, args):
+    results = []
+    if "decode" in suites:
+        results += decode_bench.run(args.iterations)
+    if "match" in suites:
+        results += match_bench.run([int(size) for size in args.sizes.split(",")], args.queries)
+    if "pipeline" in suites:
+        concurrency = [int(level) for level in args.concurrency.split(",")]
+        results += pipeline_bench.run(args.gallery, args.iterations, concurrency, args.requests)
+    if "shard" in suites:
+        shard_counts = [int(count) for count in args.shards.split(",")]
+        results += shard_bench.run(args.gallery, shard_counts, args.queries)
+    return results
+
+
+def compare(baseline, results, threshold):
+    previous = {(result["suite"], result["case"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["suite"], result["case"]))
+        if before is None:
+            continue
+        for metric, value in result.items():
+            if metric not in before or not isinstance(value, (int, float)):
+                continue
+            if metric.endswith("_ms") and value > before[metric] * (1 + threshold):
+                regressions.append((result["suite"], result["case"], metric, before[metric], value))
+            elif metric == "throughput_rps" and value < before[metric] * (1 - threshold):
+                regressions.append((result["suite"], result["case"], metric, before[metric], value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated subset of " + ", ".join(SUITES))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sizes", default=",".join(map(str, match_bench.DEFAULT_SIZES)))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--gallery", type=int, default=10000)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--shards", default=",".join(map(str, shard_bench.DEFAULT_SHARDS)))
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    suites = [suite for suite in args.suites.split(",") if suite]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": run_suites(suites, args),
+    }
+
+    for result in report["results"]:
+        print(f"{result['suite']:<9} {result['case']:<36} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report["results"], args.threshold)
+        for suite, case, metric, before, after in regressions:
+            print(f"REGRESSION {suite} {case} {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
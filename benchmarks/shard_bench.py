@@ -0,0 +1,94 @@
+"""Sharded gallery benchmark using local worker processes as shards.
+
+Partitions a synthetic gallery across LocalShardCluster workers, checks that
+scatter/gather answers agree with a single unsharded FaceMatcher, and times
+both. It also reports how many identities move when new people are enrolled
+and when a shard is added, which is what rebalancing costs.
+
+    python benchmarks/shard_bench.py --gallery 100000 --shards 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from bench_utils import latency_summary, service_imports, synthetic_gallery, synthetic_sightings
+
+DEFAULT_SHARDS = (1, 2, 4)
+
+
+async def time_coordinator(coordinator, queries):
+    answers, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        answers.append((await coordinator.match(query))[0])
+        timings.append((time.perf_counter() - start) * 1000)
+    return answers, timings
+
+
+def run(gallery=100000, shard_counts=DEFAULT_SHARDS, queries=200, enrollments=1000):
+    # Kept on sys.path while the cluster runs so spawned workers can import it
+    with service_imports():
+        return _run(gallery, shard_counts, queries, enrollments)
+
+
+def _run(gallery, shard_counts, queries, enrollments):
+    from matcher import FaceMatcher
+    from sharding import LocalShardCluster, shard_owner
+
+    names, encodings, centres = synthetic_gallery(gallery)
+    sightings = synthetic_sightings(centres, queries)
+
+    single = FaceMatcher()
+    single.load(names, encodings)
+    expected = [single.match(query)[0] for query in sightings]
+
+    results = []
+    for shard_count in shard_counts:
+        with LocalShardCluster(shard_count) as cluster:
+            start = time.perf_counter()
+            owned = cluster.load(names, encodings)
+            load_ms = (time.perf_counter() - start) * 1000
+            answers, timings = asyncio.run(time_coordinator(cluster.coordinator(), sightings))
+
+            # Re-partition after enrolling new people, as a replica does on reload
+            new_names, new_encodings, _ = synthetic_gallery(enrollments, seed=shard_count + 100)
+            new_names = [f"enrolled_{name}" for name in new_names]
+            start = time.perf_counter()
+            cluster.load(names + new_names, list(encodings) + list(new_encodings))
+            rebalance_ms = (time.perf_counter() - start) * 1000
+
+        moved = sum(shard_owner(name, shard_count) != shard_owner(name, shard_count + 1) for name in names)
+        result = {"suite": "shard", "case": f"scatter@{gallery}x{shard_count}"}
+        result.update(latency_summary(timings))
+        result.update({
+            "load_ms": load_ms,
+            "rebalance_ms": rebalance_ms,
+            "identities_per_shard": owned,
+            "agreement": sum(a == b for a, b in zip(answers, expected)) / len(expected),
+            "moved_when_adding_shard": moved / len(names),
+        })
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gallery", type=int, default=100000)
+    parser.add_argument("--shards", default=",".join(map(str, DEFAULT_SHARDS)), help="comma-separated shard counts")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    shard_counts = [int(count) for count in args.shards.split(",")]
+    results = run(args.gallery, shard_counts, args.queries)
+    for result in results:
+        print(f"{result['case']:<24} p50 {result['p50_ms']:8.3f} ms  p99 {result['p99_ms']:8.3f} ms  "
+              f"agreement {result['agreement']:.3f}  moved on +1 shard {result['moved_when_adding_shard']:.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import collections
+import datetime
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Start times of each teaching period; a period runs until the next one starts
+DEFAULT_PERIOD_SCHEDULE = "08:00,08:50,09:40,10:45,11:35,13:00,13:50"
+
+# Number of deltas each session keeps for reconnecting stream clients
+CHANGE_LOG_SIZE = 1000
+
+# Versions restart at 0 in a new process (including every debug reload), so
+# session keys carry a per-process epoch; a stream id from an earlier process
+# never matches and the client gets a fresh snapshot
+PROCESS_EPOCH = uuid.uuid4().hex[:8]
+
+
+class PeriodSchedule:
+    def __init__(self, start_times):
+        self.start_times = sorted(start_times)
+
+    @classmethod
+    def parse(cls, spec):
+        return cls([datetime.time.fromisoformat(item.strip()) for item in spec.split(',') if item.strip()])
+
+    def period_at(self, now):
+        # Period 0 covers the time before the first period of the day
+        period = 0
+        for number, start in enumerate(self.start_times, start=1):
+            if now.time() >= start:
+                period = number
+        return period
+
+
+class AttendanceSession:
+    """Attendance for one room during one period.
+
+    The (version, statuses) state is replaced wholesale on every write and never
+    mutated, so readers take a snapshot without locking. Writers serialize on a
+    per-session lock, which is also the condition stream clients wait on.
+    """
+
+    def __init__(self, room, date, period, roster):
+        self.room = room
+        self.date = date
+        self.period = period
+        self.key = f"{room}/{date.isoformat()}/{period}/{PROCESS_EPOCH}"
+        self.closed = False
+        self._state = (0, {name: "absent" for name in roster})
+        self._changes = collections.deque(maxlen=CHANGE_LOG_SIZE)
+        self.changed = threading.Condition(threading.Lock())
+
+    @property
+    def label(self):
+        return f"PERIOD: {self.period}  {self.date.strftime('DATE: %d %b')}"
+
+    def snapshot(self):
+        return self._state
+
+    def apply(self, updates):
+        # Cheap lock-free check first: repeat sightings change nothing
+        version, statuses = self._state
+        if all(statuses.get(name) == status for name, status in updates.items()):
+            return version
+
+        with self.changed:
+            version, statuses = self._state
+            pending = {name: status for name, status in updates.items() if statuses.get(name) != status}
+            if not pending:
+                return version
+
+            timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+            for name, status in pending.items():
+                version += 1
+                self._changes.append({
+                    "version": version,
+                    "name": name,
+                    "status": status,
+                    "timestamp": timestamp
+                })
+            self._state = (version, {**statuses, **pending})
+            self.changed.notify_all()
+        return version
+
+    def reset(self, roster):
+        with self.changed:
+            version, _ = self._state
+            # A reset can't be expressed as deltas, so drop the change log and
+            # make every stream resend a snapshot
+            self._changes.clear()
+            self._state = (version + 1, {name: "absent" for name in roster})
+            self.changed.notify_all()
+
+    def changes_since(self, version):
+        # Returns None when the deltas are no longer available
+        with self.changed:
+            current_version, _ = self._state
+            if version > current_version:
+                return None
+            if version == current_version:
+                return []
+            if not self._changes or self._changes[0]["version"] > version + 1:
+                return None
+            return [change for change in self._changes if change["version"] > version]
+
+    def wait_for_change(self, version, timeout):
+        with self.changed:
+            if self._state[0] == version and not self.closed:
+                self.changed.wait(timeout)
+
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+
+
+class AttendanceRegistry:
+    """Current attendance session per room, rolled over as the schedule advances."""
+
+    def __init__(self, schedule, roster):
+        self.schedule = schedule
+        self.roster = roster
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def current(self, room, now=None):
+        now = now or datetime.datetime.now()
+        date, period = now.date(), self.schedule.period_at(now)
+
+        session = self._sessions.get(room)
+        if session is not None and session.date == date and session.period == period:
+            return session
+
+        # Only taken when a room starts a new period
+        with self._lock:
+            previous = self._sessions.get(room)
+            if previous is not None and previous.date == date and previous.period == period:
+                return previous
+            session = AttendanceSession(room, date, period, self.roster())
+            self._sessions = {**self._sessions, room: session}
+
+        if previous is not None:
+            previous.close()
+        logger.info(f"Started attendance session {session.key}")
+        return session
@@ -0,0 +1,72 @@
+import numpy as np
+
+# A copy of the gallery half of FaceMatcher in
+# backend/services/face_recognition/matcher.py (load, identity_distance,
+# ranked), without the recognition cache. The frontend runs and ships on its
+# own and can't import from the backend services, so keep the two in sync.
+
+EMBEDDING_SIZE = 128
+DEFAULT_TOLERANCE = 0.6
+DEFAULT_REFINE_CANDIDATES = 3
+
+
+class FaceGallery:
+    """Known faces for the camera path, matched like FaceMatcher.
+
+    Built once per reload and never changed afterwards, so request threads
+    can keep using the gallery they started with.
+    """
+
+    def __init__(self, names=(), encodings=(), tolerance=DEFAULT_TOLERANCE,
+                 refine_candidates=DEFAULT_REFINE_CANDIDATES):
+        self.tolerance = tolerance
+        self.refine_candidates = refine_candidates
+        self.load(names, encodings)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def photo_count(self):
+        return len(self.samples)
+
+    def load(self, names, encodings):
+        # names[i] is the learner in encodings[i]; names may repeat
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, EMBEDDING_SIZE)
+        identities = list(dict.fromkeys(names))
+        index_of = {name: index for index, name in enumerate(identities)}
+        owners = np.array([index_of[name] for name in names], dtype=np.intp)
+
+        order = np.argsort(owners, kind="stable")
+        counts = np.bincount(owners, minlength=len(identities))
+        samples = encodings[order]
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+        if identities:
+            centroids = np.add.reduceat(samples, offsets[:-1], axis=0) / counts[:, None]
+        else:
+            centroids = np.empty((0, EMBEDDING_SIZE))
+
+        self.names, self.samples, self.offsets, self.centroids = identities, samples, offsets, centroids
+
+    def identity_distance(self, index, embedding):
+        samples = self.samples[self.offsets[index]:self.offsets[index + 1]]
+        return float(np.min(np.linalg.norm(samples - embedding, axis=1)))
+
+    def ranked(self, embedding, count):
+        # The `count` closest learners as (index, distance), nearest first
+        centroid_distances = np.linalg.norm(self.centroids - embedding, axis=1)
+        refine = min(max(count, self.refine_candidates), len(self.names))
+        candidates = np.argpartition(centroid_distances, refine - 1)[:refine]
+        return sorted(
+            ((int(index), self.identity_distance(index, embedding)) for index in candidates),
+            key=lambda candidate: candidate[1]
+        )[:count]
+
+    def match(self, embedding):
+        # Returns the learner's name, or None when nobody is within tolerance
+        if not self.names:
+            return None
+        best_match_index, distance = self.ranked(embedding, 1)[0]
+        if distance > self.tolerance:
+            return None
+        return self.names[best_match_index]
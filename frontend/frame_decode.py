@@ -0,0 +1,117 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# Longest side the face detector needs. Larger JPEG frames are decoded at
+# 1/2, 1/4 or 1/8 scale straight from the DCT coefficients.
+DETECTION_MAX_SIDE = int(os.getenv("DETECTION_MAX_SIDE", "1280"))
+
+REDUCED_READ_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Upload buffers are rounded up to this size so that frames of slightly
+# different sizes can share one
+UPLOAD_BUFFER_STEP = 64 * 1024
+# Idle upload buffers kept for later requests, and the largest one worth keeping
+UPLOAD_POOL_SIZE = 4
+UPLOAD_POOL_MAX_BUFFER = 16 * 1024 * 1024
+
+
+class BufferPool:
+    """A few upload buffers shared by every request thread.
+
+    The development server starts a thread per connection, so buffers kept
+    per thread were almost never reused. Buffers here outlive the request
+    that allocated them.
+    """
+
+    def __init__(self, size=UPLOAD_POOL_SIZE, max_buffer=UPLOAD_POOL_MAX_BUFFER, step=UPLOAD_BUFFER_STEP):
+        self.size = size
+        self.max_buffer = max_buffer
+        self.step = step
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self, length):
+        with self._lock:
+            # Smallest idle buffer that fits
+            fitting = [buffer for buffer in self._free if len(buffer) >= length]
+            if fitting:
+                buffer = min(fitting, key=len)
+                self._free.remove(buffer)
+                return buffer
+        return bytearray(-(-length // self.step) * self.step)
+
+    def release(self, buffer):
+        if len(buffer) > self.max_buffer:
+            return
+        with self._lock:
+            if len(self._free) < self.size:
+                self._free.append(buffer)
+
+
+_upload_buffers = BufferPool()
+
+
+def jpeg_size(data):
+    # Reads (width, height) from the first SOF marker, or None if not a JPEG
+    if bytes(data[:2]) != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return (data[i + 7] << 8) | data[i + 8], (data[i + 5] << 8) | data[i + 6]
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+def read_upload(stream, buffer):
+    # Fills buffer instead of allocating a bytes copy; returns the filled view
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(view):
+        read = stream.readinto(view[filled:])
+        if not read:
+            break
+        filled += read
+    return view[:filled]
+
+
+def decode_frame(stream, max_side=DETECTION_MAX_SIDE):
+    # Returns an RGB frame, or None if the upload could not be decoded
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    if not size:
+        return None
+
+    buffer = _upload_buffers.acquire(size)
+    try:
+        data = read_upload(stream, memoryview(buffer)[:size])
+
+        flags = cv2.IMREAD_COLOR
+        dimensions = jpeg_size(data)
+        if dimensions is not None and max_side:
+            for factor, reduced_flags in REDUCED_READ_FLAGS:
+                if max(dimensions) // factor >= max_side:
+                    flags = reduced_flags
+                    break
+
+        bgr = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+    finally:
+        _upload_buffers.release(buffer)
+    if bgr is None:
+        return None
+
+    # imdecode always allocates a fresh image, so swap the channels in place
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=bgr)
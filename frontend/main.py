@@ -5,9 +5,11 @@ import time
 import datetime
 import os
 from flask import Flask, jsonify, request, send_from_directory, Response
-import threading
-import numpy as np
 import socket
+import json
+from frame_decode import decode_frame
+from attendance_sessions import AttendanceRegistry, PeriodSchedule, DEFAULT_PERIOD_SCHEDULE
+from face_gallery import FaceGallery
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,42 +17,46 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='.')
 
-# Initialize known face encodings and names
-known_face_encodings = []
-known_face_names = []
+# Known faces, replaced wholesale whenever the gallery is reloaded
+known_faces = FaceGallery()
 
-# Initialize attendance status
-attendance = {}
-
-# Get current date and time
-date = datetime.datetime.now()
-current_date = date.strftime("DATE: %d %b")
-current_time = date.strftime("%H:%M")
-
-period = f"PERIOD: 1  {current_date}"
-
-# Create a lock for thread-safe operations
-lock = threading.Lock()
+# Attendance is tracked per room and per period; sessions roll over
+# automatically as the period schedule advances
+DEFAULT_ROOM = "default"
+# Only configured rooms get a session, so clients can't grow the registry
+ATTENDANCE_ROOMS = {room.strip() for room in os.getenv("ATTENDANCE_ROOMS", DEFAULT_ROOM).split(',') if room.strip()}
+STREAM_KEEPALIVE_SECONDS = 15
+period_schedule = PeriodSchedule.parse(os.getenv("PERIOD_SCHEDULE", DEFAULT_PERIOD_SCHEDULE))
+attendance_sessions = AttendanceRegistry(period_schedule, lambda: list(known_faces.names))
 
 # Global variable for the camera
 camera = None
 
 def load_known_faces():
-    global known_face_encodings, known_face_names
+    global known_faces
     known_face_encodings = []
     known_face_names = []
     try:
         # Create the 'known_faces' directory if it doesn't exist
         os.makedirs('known_faces', exist_ok=True)
         
-        face_files = [f for f in os.listdir('known_faces') if f.endswith(('.jpg', '.png'))]
+        # known_faces/<name>.jpg holds a single photo, known_faces/<name>/*.jpg many
+        face_files = []
+        for entry in sorted(os.listdir('known_faces')):
+            entry_path = os.path.join('known_faces', entry)
+            if os.path.isdir(entry_path):
+                face_files.extend(
+                    (entry, os.path.join(entry, f)) for f in sorted(os.listdir(entry_path)) if f.endswith(('.jpg', '.png'))
+                )
+            elif entry.endswith(('.jpg', '.png')):
+                face_files.append((os.path.splitext(entry)[0], entry))
         
         if not face_files:
             logger.warning("No known faces found in the 'known_faces' directory")
+            known_faces = FaceGallery()
             return
 
-        for filename in face_files:
-            name = os.path.splitext(filename)[0]
+        for name, filename in face_files:
             image_path = os.path.join('known_faces', filename)
             image = face_recognition.load_image_file(image_path)
             encoding = face_recognition.face_encodings(image)
@@ -61,38 +67,61 @@ def load_known_faces():
             else:
                 logger.warning(f"No face found in {filename}, skipping")
 
-        logger.info(f"Loaded {len(known_face_names)} known faces")
+        known_faces = FaceGallery(known_face_names, known_face_encodings)
+        logger.info(f"Loaded {len(known_faces)} known faces from {known_faces.photo_count} photos")
     except Exception as e:
         logger.error(f"Error loading known faces: {str(e)}")
 
 # Load initial known faces
 load_known_faces()
 
-def check_for_faces(frame):
+def build_attendance_snapshot(session):
+    version, statuses = session.snapshot()
+    return {
+        "session": session.key,
+        "room": session.room,
+        "version": version,
+        "period": session.label,
+        "current_time": datetime.datetime.now().strftime("%H:%M"),
+        "attendance": [
+            {
+                "id": i + 1,
+                "name": name,
+                "status": status
+            } for i, (name, status) in enumerate(statuses.items())
+        ]
+    }
+
+def valid_learner_name(name):
+    # The name becomes a directory under known_faces, so it must stay inside it
+    return bool(name) and not name.startswith('.') and not any(c in name for c in '/\\\0')
+
+def requested_room(values):
+    # Returns None for a room that isn't in ATTENDANCE_ROOMS
+    room = values.get('room', DEFAULT_ROOM)
+    return room if room in ATTENDANCE_ROOMS else None
+
+def check_for_faces(rgb_frame):
     try:
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         face_locations = face_recognition.face_locations(rgb_frame)
         return face_recognition.face_encodings(rgb_frame, face_locations), face_locations
     except Exception as e:
         logger.error(f"Error checking for faces: {str(e)}")
         return [], []
 
-def process_frame(frame):
-    face_encodings, face_locations = check_for_faces(frame)
+def process_frame(rgb_frame, room=DEFAULT_ROOM):
+    face_encodings, face_locations = check_for_faces(rgb_frame)
     
+    recognized = {}
     for face_encoding in face_encodings:
-        matches = face_recognition.compare_faces(known_face_encodings, face_encoding)
-        name = "Unknown"
-        
-        face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-        best_match_index = np.argmin(face_distances)
-        if matches[best_match_index]:
-            name = known_face_names[best_match_index]
-        
-        with lock:
-            attendance[name] = "present"
+        name = known_faces.match(face_encoding) or "Unknown"
+        recognized[name] = "present"
     
-    return face_locations, [name for name in attendance if attendance[name] == "present"]
+    # One batched update per frame rather than one lock round-trip per face
+    session = attendance_sessions.current(room)
+    session.apply(recognized)
+    _, statuses = session.snapshot()
+    return face_locations, [name for name, status in statuses.items() if status == "present"]
 
 @app.route('/')
 def index():
@@ -100,31 +129,75 @@ def index():
 
 @app.route('/api/get_attendance', methods=['GET'])
 def get_attendance():
+    room = requested_room(request.args)
+    if room is None:
+        return jsonify({"message": "Unknown room"}), 400
     try:
-        with lock:
-            attendance_data = [
-                {
-                    "id": i + 1,
-                    "name": name,
-                    "status": status
-                } for i, (name, status) in enumerate(attendance.items())
-            ]
-        return jsonify({
-            "period": period,
-            "current_time": datetime.datetime.now().strftime("%H:%M"),
-            "attendance": attendance_data
-        })
+        session = attendance_sessions.current(room)
+        return jsonify(build_attendance_snapshot(session))
     except Exception as e:
         logger.error(f"Error getting attendance: {str(e)}")
         return jsonify({"message": "An error occurred while getting attendance"}), 500
 
+def format_event(event, session, version, data):
+    return f"id: {session.key}@{version}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+def attendance_events(room, session_key, last_version):
+    while True:
+        session = attendance_sessions.current(room)
+        if session.key != session_key:
+            session_key, last_version = session.key, None
+
+        version, _ = session.snapshot()
+        if last_version == version:
+            session.wait_for_change(version, STREAM_KEEPALIVE_SECONDS)
+            if session.closed or session.snapshot()[0] == version:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+
+        deltas = session.changes_since(last_version) if last_version is not None else None
+        if deltas is None:
+            snapshot = build_attendance_snapshot(session)
+            last_version = snapshot["version"]
+            yield format_event("snapshot", session, last_version, snapshot)
+        else:
+            for change in deltas:
+                yield format_event("delta", session, change["version"], change)
+                last_version = change["version"]
+
+@app.route('/api/attendance_stream', methods=['GET'])
+def attendance_stream():
+    room = requested_room(request.args)
+    if room is None:
+        return jsonify({"message": "Unknown room"}), 400
+
+    # EventSource resends the last seen id ("<session>@<version>") on
+    # reconnect. Other clients resume from /api/get_attendance with
+    # ?since=<session>@<version>, or a bare ?since=<version>, which is taken
+    # to be a version of the room's current session.
+    since = request.headers.get('Last-Event-ID') or request.args.get('since') or ''
+    session_key, _, version = since.rpartition('@')
+    try:
+        last_version = int(version)
+    except ValueError:
+        session_key, last_version = None, None
+    if last_version is not None and not session_key:
+        session_key = attendance_sessions.current(room).key
+
+    return Response(attendance_events(room, session_key, last_version),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/reset_attendance', methods=['POST'])
 def reset_attendance():
+    room = requested_room(request.values)
+    if room is None:
+        return jsonify({"message": "Unknown room"}), 400
     try:
-        global attendance
-        with lock:
-            attendance = {name: "absent" for name in known_face_names}
-        logger.info("Attendance reset successfully")
+        session = attendance_sessions.current(room)
+        session.reset(known_faces.names)
+        logger.info(f"Attendance reset successfully for {session.key}")
         return jsonify({"message": "Attendance reset successfully"})
     except Exception as e:
         logger.error(f"Error resetting attendance: {str(e)}")
@@ -136,23 +209,29 @@ def add_learner():
         if 'photo' not in request.files or 'name' not in request.form:
             return jsonify({"message": "Missing photo or name"}), 400
 
-        photo = request.files['photo']
+        # Several photos of the same learner can be sent as repeated 'photo' fields
+        photos = request.files.getlist('photo')
         name = request.form['name']
 
-        if photo.filename == '':
+        if any(photo.filename == '' for photo in photos):
             return jsonify({"message": "No selected file"}), 400
 
-        if photo and name:
-            # Create the 'known_faces' directory if it doesn't exist
-            os.makedirs('known_faces', exist_ok=True)
+        if not valid_learner_name(name):
+            return jsonify({"message": "Invalid learner name"}), 400
+
+        if photos and name:
+            # Each learner gets a directory of sample photos under 'known_faces'
+            learner_dir = os.path.join('known_faces', name)
+            os.makedirs(learner_dir, exist_ok=True)
             
-            filename = f"{name}.jpg"
-            photo.save(os.path.join('known_faces', filename))
+            stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+            for i, photo in enumerate(photos):
+                photo.save(os.path.join(learner_dir, f"{stamp}_{i}.jpg"))
             
             # Reload known faces
             load_known_faces()
             
-            logger.info(f"Added new learner: {name}")
+            logger.info(f"Added {len(photos)} photo(s) for learner: {name}")
             return jsonify({"message": f"Learner {name} added successfully"})
     except Exception as e:
         logger.error(f"Error adding learner: {str(e)}")
@@ -162,12 +241,15 @@ def add_learner():
 def process_client_frame():
     if 'frame' not in request.files:
         return jsonify({"error": "No frame provided"}), 400
+    room = requested_room(request.form)
+    if room is None:
+        return jsonify({"error": "Unknown room"}), 400
     
-    frame_file = request.files['frame']
-    frame_array = np.frombuffer(frame_file.read(), np.uint8)
-    frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+    frame = decode_frame(request.files['frame'].stream)
+    if frame is None:
+        return jsonify({"error": "Could not decode frame"}), 400
     
-    face_locations, recognized_names = process_frame(frame)
+    face_locations, recognized_names = process_frame(frame, room)
     
     return jsonify({
         "faces_detected": len(face_locations),